@@ -1,10 +1,43 @@
-import pdfplumber
-from typing import List, Dict, Tuple
-import json
+import ctypes
+from collections import Counter, namedtuple
+import math
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from typing import List, Optional, Tuple
+import numpy as np
+import orjson
 import os
-from tqdm import tqdm
 import re
 
+# A detected heading; converted to a dict only when written to JSON
+Heading = namedtuple('Heading', 'text page level')
+
+# A page's lines top to bottom, with per-line font size, bold flag and word count
+PageLines = namedtuple('PageLines', 'lines sizes bold n_words')
+
+
+def _group_lines(tops, sizes, bold):
+    """Group chars into lines by their top position rounded to 0.1pt.
+
+    Args:
+        tops (np.ndarray): Char top positions
+        sizes (np.ndarray): Char font sizes
+        bold (np.ndarray): Whether each char is set in a bold font
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Char indices
+        sorted top to bottom (stable within a line), line boundaries into that
+        order, and each line's rounded font size and bold flag, both taken
+        from its first char
+    """
+    keys = np.round(tops, 1)
+    order = np.argsort(keys, kind="stable")
+    # A new line starts wherever the sorted key changes
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(keys[order])) + 1, [len(order)]))
+    firsts = order[bounds[:-1]]
+    return order, bounds, np.round(sizes[firsts], 1), bold[firsts]
+
+
 class HeadingExtractor:
     def __init__(self):
         self.headings = []
@@ -18,16 +51,22 @@ class HeadingExtractor:
             'ja': ['章', '節', '部', '概要', '要約', '結論', '付録'],
             'ko': ['장', '절', '부분', '개요', '요약', '결론', '부록']
         }
+        # Single prefix regex over all keywords, so one C-level match replaces
+        # a startswith call per keyword
+        keywords = dict.fromkeys(k for patterns in self.heading_patterns.values() for k in patterns)
+        self._heading_re = re.compile('^(?:' + '|'.join(re.escape(k) for k in keywords) + ')')
         # Font size thresholds for heading levels
-        self.size_thresholds = {}
+        self.size_thresholds = Counter()
+        self._finalize_thresholds()
 
-    def _is_heading(self, line: str, font_size: float, font_name: str) -> bool:
+    def _is_heading(self, line: str, n_words: int, size_rule: bool) -> bool:
         """Determine if a line is likely a heading using improved rules.
 
         Args:
             line (str): Line of text
-            font_size (float): Font size of the line
-            font_name (str): Font name/family
+            n_words (int): Number of words in the line
+            size_rule (bool): Result of the font size and bold rules, as
+                computed by _process_page
 
         Returns:
             bool: True if line appears to be a heading
@@ -35,35 +74,27 @@ class HeadingExtractor:
         if not line or len(line) > 100:
             return False
 
-        # Update size thresholds based on observed font sizes
-        if font_size > 0:
-            if font_size not in self.size_thresholds:
-                self.size_thresholds[font_size] = 1
-            else:
-                self.size_thresholds[font_size] += 1
-
         # Common heading keywords in all languages
-        if any(any(line.startswith(k) for k in patterns) for patterns in self.heading_patterns.values()):
+        if self._heading_re.match(line):
             return True
 
         # Numbered patterns (e.g., 1., 1.1, 1.1.1)
         if line[:6].strip().replace('.', '').isdigit() and '.' in line[:6]:
             return True
 
-        # ALL CAPS lines (likely headings)
-        if line.isupper() and len(line.split()) <= 6:
-            return True
+        # Both case checks below fail when the line starts with a lowercase
+        # letter, which is the common case for body text, so skip their scans
+        if not line[0].islower():
+            # ALL CAPS lines (likely headings)
+            if n_words <= 6 and line.isupper():
+                return True
 
-        # Title case with few words (likely section titles)
-        if line.istitle() and len(line.split()) <= 8:
-            return True
+            # Title case with few words (likely section titles)
+            if n_words <= 8 and line.istitle():
+                return True
 
-        # Short lines with larger font size
-        if len(line.split()) <= 5 and font_size >= self._get_average_font_size():
-            return True
-
-        # Bold font indicators
-        if font_name.lower().find('bold') != -1 and len(line.split()) <= 8:
+        # Short lines with larger font size, or bold font
+        if size_rule:
             return True
 
         # Exclude form fields and labels
@@ -72,86 +103,241 @@ class HeadingExtractor:
 
         return False
 
+    def _finalize_thresholds(self):
+        """Compute font size thresholds once the font statistics are complete.
+
+        Must be called again whenever size_thresholds changes.
+        """
+        if not self.size_thresholds:
+            self._avg_size = 12.0
+            self._h1 = None
+            self._h2 = None
+            self._title_threshold = 18.0
+            self._size_to_level = {}
+            return
+
+        sizes = list(self.size_thresholds.keys())
+        largest = max(sizes)
+        self._avg_size = sum(sizes) / len(sizes)
+        self._h1 = largest * 0.9
+        self._h2 = largest * 0.8
+        self._title_threshold = largest * 0.95
+        # Documents use only a handful of distinct sizes, so resolve each
+        # size's heading level once rather than per heading
+        self._size_to_level = {size: self._determine_level(size) for size in sizes}
+
     def _get_average_font_size(self) -> float:
-        """Calculate the average font size from observed sizes.
+        """Return the average font size from observed sizes.
 
         Returns:
             float: Average font size, or 12 if no sizes recorded
         """
-        if not self.size_thresholds:
-            return 12.0
-        
-        sizes = list(self.size_thresholds.keys())
-        return sum(sizes) / len(sizes)
+        return self._avg_size
+
+    def _has_text_objects(self, page) -> bool:
+        """Check whether a PDF page may contain any text.
+
+        Args:
+            page: pypdfium2 page object
+
+        Returns:
+            bool: True if the page has a text object, or a form object that
+            might contain one
+        """
+        raw = page.raw
+        for i in range(pdfium_c.FPDFPage_CountObjects(raw)):
+            obj_type = pdfium_c.FPDFPageObj_GetType(pdfium_c.FPDFPage_GetObject(raw, i))
+            if obj_type == pdfium_c.FPDF_PAGEOBJ_TEXT or obj_type == pdfium_c.FPDF_PAGEOBJ_FORM:
+                return True
+        return False
 
-    def extract_headings(self, pdf_path: str) -> Tuple[str, List[Dict]]:
-        """Extract headings from a PDF file using pdfplumber.
+    def _read_page_chars(self, page) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Read character text, size, position and font weight from a PDF page.
+
+        Args:
+            page: pypdfium2 page object
+
+        Returns:
+            Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]: Char texts with
+            whitespace stripped, font sizes, top positions measured from the top
+            of the page, and whether each char's font name marks it as bold
+        """
+        texts, sizes, tops, bold = [], [], [], []
+        # Scanned or image-only pages have no text objects, so skip building
+        # a text page for them
+        if not self._has_text_objects(page):
+            return (texts, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64),
+                    np.empty(0, dtype=np.bool_))
+
+        page_height = page.get_height()
+        textpage = page.get_textpage()
+        try:
+            raw = textpage.raw
+            matrix = pdfium_c.FS_MATRIX()
+            origin_x = ctypes.c_double()
+            origin_y = ctypes.c_double()
+            font_buf = ctypes.create_string_buffer(256)
+            font_flags = ctypes.c_int()
+            font_buf_len = len(font_buf)
+
+            # Bind the per-char calls to locals once; the loop below runs for
+            # every char in the document
+            is_generated = pdfium_c.FPDFText_IsGenerated
+            get_unicode = pdfium_c.FPDFText_GetUnicode
+            get_matrix = pdfium_c.FPDFText_GetMatrix
+            get_font_size = pdfium_c.FPDFText_GetFontSize
+            get_origin = pdfium_c.FPDFText_GetCharOrigin
+            get_font_info = pdfium_c.FPDFText_GetFontInfo
+            hypot = math.hypot
+            add_text, add_size, add_top, add_bold = texts.append, sizes.append, tops.append, bold.append
+
+            for i in range(pdfium_c.FPDFText_CountChars(raw)):
+                # Skip spaces and line breaks pdfium synthesizes between words
+                if is_generated(raw, i):
+                    continue
+                code = get_unicode(raw, i)
+                if 0xD800 <= code <= 0xDFFF:
+                    continue
+
+                # Scale the nominal font size by the text matrix to get the rendered size
+                get_matrix(raw, i, matrix)
+                size = get_font_size(raw, i) * hypot(matrix.c, matrix.d)
+                # Measure top from the baseline rather than the glyph box, so
+                # chars on the same line share one top regardless of their shape
+                get_origin(raw, i, origin_x, origin_y)
+                length = get_font_info(raw, i, font_buf, font_buf_len, font_flags)
+
+                # Whitespace is dropped from line text, so strip it here once
+                add_text(chr(code).strip())
+                add_size(size)
+                add_top(page_height - origin_y.value - size)
+                add_bold(0 < length <= font_buf_len and b'bold' in font_buf.value.lower())
+        finally:
+            textpage.close()
+
+        return (texts, np.array(sizes, dtype=np.float64), np.array(tops, dtype=np.float64),
+                np.array(bold, dtype=np.bool_))
+
+    def extract_headings(self, pdf_path: str) -> Tuple[str, List[Heading]]:
+        """Extract headings from a PDF file using pypdfium2.
 
         Args:
             pdf_path (str): Path to the PDF file
 
         Returns:
-            Tuple[str, List[Dict]]: Document title and list of headings with their properties
+            Tuple[str, List[Heading]]: Document title and list of headings with their properties
         """
         self.headings = []  # Clear previous headings
-        self.size_thresholds = {}  # Reset font size observations
+        self.size_thresholds = Counter()  # Reset font size observations
+        self._finalize_thresholds()
         title = "Untitled"
 
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                # First pass: gather font statistics
-                for page in pdf.pages:
-                    for char in page.chars:
-                        if char["size"] > 0:
-                            size = round(float(char["size"]), 1)
-                            if size not in self.size_thresholds:
-                                self.size_thresholds[size] = 1
-                            else:
-                                self.size_thresholds[size] += 1
-
-                # Second pass: extract headings
-                for page_num in tqdm(range(len(pdf.pages)), desc=f'Processing {os.path.basename(pdf_path)}'):
-                    page = pdf.pages[page_num]
-                    lines_by_font = {}
-
-                    for char in page.chars:
-                        font_size = round(float(char["size"]), 1)
-                        font_name = char.get("fontname", "")
-                        text = char["text"].strip()
-
-                        # Group chars by line position + font size
-                        top_key = round(char["top"], 1)
-                        if top_key not in lines_by_font:
-                            lines_by_font[top_key] = {
-                                "text": "",
-                                "size": font_size,
-                                "font": font_name,
-                                "page": page_num + 1
-                            }
-
-                        lines_by_font[top_key]["text"] += text
-
-                    for entry in lines_by_font.values():
-                        line = entry["text"].strip()
-                        if not line or len(line) > 100:
-                            continue
-
-                        if self._is_heading(line, entry["size"], entry["font"]):
-                            level = self._determine_level(entry["size"])
-                            if title == "Untitled" and entry["size"] >= self._get_title_threshold():
-                                title = line
-                            self.headings.append({
-                                "text": line,
-                                "page": entry["page"],
-                                "level": level
-                            })
-
-                return title, self.headings
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                # Single pass over the chars: gather font statistics and group
+                # chars into lines. pdfium is not thread-safe, so all PDF
+                # access happens here, serially. Only the lines are kept.
+                pages = []
+                for page_index in range(len(pdf)):
+                    page = pdf[page_index]
+                    try:
+                        page_chars = self._read_page_chars(page)
+                    finally:
+                        page.close()
+
+                    raw_sizes = page_chars[1]
+                    self.size_thresholds.update(np.round(raw_sizes[raw_sizes > 0], 1).tolist())
+                    pages.append(self._group_page(page_chars))
+            finally:
+                pdf.close()
+            self._finalize_thresholds()
+
+            # Classify lines now that thresholds are known
+            results = [self._process_page(page_lines, i) for i, page_lines in enumerate(pages)]
+            print(f"{os.path.basename(pdf_path)}: {len(pages)} pages done")
+
+            # The title is the first candidate in page order
+            for local_headings, local_title in results:
+                if title == "Untitled" and local_title is not None:
+                    title = local_title
+                self.headings.extend(local_headings)
+
+            return title, self.headings
 
         except Exception as e:
             print(f"Error processing {pdf_path}: {str(e)}")
             return "Untitled", []
 
+    def _group_page(self, page_chars: Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]) -> PageLines:
+        """Group a page's characters into lines.
+
+        Args:
+            page_chars (Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]):
+                Char data as returned by _read_page_chars
+
+        Returns:
+            PageLines: Line texts, top to bottom, with each line's font size,
+            bold flag and word count
+        """
+        texts, sizes, tops, bold = page_chars
+        lines, keep = [], []
+        if texts:
+            order, bounds, line_sizes, line_bold = _group_lines(tops, sizes, bold)
+            order = order.tolist()
+            bounds = bounds.tolist()
+            # _group_lines only returns line boundaries; text is joined here.
+            # Each line is built with one join over its chunks, never by
+            # repeated concatenation
+            get_text = texts.__getitem__
+            for j in range(len(bounds) - 1):
+                line = "".join(map(get_text, order[bounds[j]:bounds[j + 1]]))
+                if not line or len(line) > 100:
+                    continue
+                lines.append(line)
+                keep.append(j)
+        else:
+            line_sizes = np.empty(0, dtype=np.float64)
+            line_bold = np.empty(0, dtype=np.bool_)
+
+        n_words = np.array([len(line.split()) for line in lines], dtype=np.int64)
+        return PageLines(lines, line_sizes[keep], line_bold[keep], n_words)
+
+    def _process_page(self, page_lines: PageLines, page_num: int) -> Tuple[List[Heading], Optional[str]]:
+        """Detect headings among a page's lines.
+
+        Args:
+            page_lines (PageLines): Lines as returned by _group_page
+            page_num (int): Zero-based page index
+
+        Returns:
+            Tuple[List[Heading], Optional[str]]: Headings found on the page and the
+            first title candidate, or None if the page has none
+        """
+        local_headings = []
+        local_title = None
+        if not page_lines.lines:
+            return local_headings, local_title
+
+        # Short lines with a larger font size, and short bold lines
+        n_words = page_lines.n_words
+        size_rule = (((n_words <= 5) & (page_lines.sizes >= self._get_average_font_size()))
+                     | ((n_words <= 8) & page_lines.bold))
+        title_threshold = self._get_title_threshold()
+        size_to_level = self._size_to_level
+        title_found = False
+
+        for line, font_size, words, by_size in zip(page_lines.lines, page_lines.sizes.tolist(),
+                                                   n_words.tolist(), size_rule.tolist()):
+            if self._is_heading(line, words, by_size):
+                level = size_to_level.get(font_size) or self._determine_level(font_size)
+                if not title_found and font_size >= title_threshold:
+                    local_title = line
+                    title_found = True
+                local_headings.append(Heading(line, page_num + 1, level))
+
+        return local_headings, local_title
+
     def _determine_level(self, size: float) -> str:
         """Determine heading level based on font size distribution.
 
@@ -161,38 +347,23 @@ class HeadingExtractor:
         Returns:
             str: Heading level (H1, H2, or H3)
         """
-        if not self.size_thresholds:
+        if self._h1 is None:
             return "H3"
 
-        sizes = sorted(self.size_thresholds.keys(), reverse=True)
-        if not sizes:
-            return "H3"
-
-        largest = sizes[0]
-        threshold_h1 = largest * 0.9
-        threshold_h2 = largest * 0.8
-
-        if size >= threshold_h1:
+        if size >= self._h1:
             return "H1"
-        elif size >= threshold_h2:
+        elif size >= self._h2:
             return "H2"
         else:
             return "H3"
 
     def _get_title_threshold(self) -> float:
-        """Calculate the threshold for title font size.
+        """Return the threshold for title font size.
 
         Returns:
             float: Font size threshold for titles
         """
-        if not self.size_thresholds:
-            return 18.0
-
-        sizes = sorted(self.size_thresholds.keys(), reverse=True)
-        if not sizes:
-            return 18.0
-
-        return sizes[0] * 0.95
+        return self._title_threshold
 
     def save_to_json(self, output_path: str, title: str = "Untitled"):
         """Save extracted headings to a JSON file.
@@ -203,7 +374,7 @@ class HeadingExtractor:
         """
         result = {
             "title": title,
-            "outline": self.headings
+            "outline": [heading._asdict() for heading in self.headings]
         }
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
\ No newline at end of file
@@ -1,7 +1,30 @@
 import os
+from multiprocessing import Pool
 from app.extractor import HeadingExtractor
 from typing import List, Tuple
 
+def _extract_one(job: Tuple[str, str]) -> Tuple[str, str, int]:
+    """Extract headings from a single PDF in a worker process and save them.
+
+    The worker writes its own JSON file so only a small summary is sent back
+    to the parent process.
+
+    Args:
+        job (Tuple[str, str]): Path to the PDF file and output directory
+
+    Returns:
+        Tuple[str, str, int]: PDF filename, document title and number of headings
+    """
+    pdf_path, output_dir = job
+    filename = os.path.basename(pdf_path)
+    extractor = HeadingExtractor()
+    title, headings = extractor.extract_headings(pdf_path)
+
+    if headings:
+        output_filename = os.path.splitext(filename)[0] + '.json'
+        extractor.save_to_json(os.path.join(output_dir, output_filename), title)
+    return filename, title, len(headings)
+
 def process_pdfs(input_dir: str, output_dir: str) -> List[str]:
     """Process all PDF files in the input directory and save results to output directory.
 
@@ -16,22 +39,22 @@ def process_pdfs(input_dir: str, output_dir: str) -> List[str]:
     os.makedirs(output_dir, exist_ok=True)
     
     processed_files = []
-    extractor = HeadingExtractor()
+    pdf_names = [f for f in sorted(os.listdir(input_dir)) if f.lower().endswith('.pdf')]
+    pdf_paths = [os.path.join(input_dir, f) for f in pdf_names]
+    if not pdf_paths:
+        return processed_files
 
-    # Process each PDF file
-    for filename in os.listdir(input_dir):
-        if filename.lower().endswith('.pdf'):
-            pdf_path = os.path.join(input_dir, filename)
-            output_filename = os.path.splitext(filename)[0] + '.json'
-            output_path = os.path.join(output_dir, output_filename)
-
-            print(f"\nProcessing {filename}...")
-            title, headings = extractor.extract_headings(pdf_path)
-            
-            if headings:
-                extractor.save_to_json(output_path, title)
+    # Parse PDFs in parallel and collect results as each one finishes, so
+    # fast files are not held up behind slow ones
+    processes = min(os.cpu_count() or 1, 8, len(pdf_paths))
+    chunksize = max(1, len(pdf_paths) // (processes * 4))
+    jobs = [(pdf_path, output_dir) for pdf_path in pdf_paths]
+    with Pool(processes=processes) as pool:
+        for filename, title, n_headings in pool.imap_unordered(_extract_one, jobs, chunksize=chunksize):
+            print(f"\nProcessed {filename}")
+            if n_headings:
                 processed_files.append(filename)
-                print(f"Extracted {len(headings)} headings from {filename}")
+                print(f"Extracted {n_headings} headings from {filename}")
                 print(f"Document title: {title}")
             else:
                 print(f"No headings found in {filename}")